@@ -19,24 +19,26 @@ import time
 import subprocess
 from pathlib import Path
 
-def run_script(script_name, description):
-    """Run a script and display progress."""
+def print_header(description):
+    """Print the banner shown before each pipeline stage."""
     print(f"\n{'='*60}")
     print(f"🚀 {description}")
     print(f"{'='*60}")
+
+def run_script(script_name, description):
+    """Run a script in a separate interpreter, streaming its output as it arrives."""
+    print_header(description)
     
     try:
-        result = subprocess.run([sys.executable, script_name], 
-                              capture_output=True, text=True)
+        with subprocess.Popen([sys.executable, '-u', script_name], stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, text=True, bufsize=1) as proc:
+            for line in proc.stdout:
+                print(line, end='')
         
-        if result.returncode == 0:
-            print(f" {script_name} completed successfully!")
-            if result.stdout:
-                print(result.stdout)
-        else:
-            print(f" Error in {script_name}:")
-            print(result.stderr)
+        if proc.returncode != 0:
+            print(f" Error in {script_name} (exit code {proc.returncode})")
             return False
+        print(f" {script_name} completed successfully!")
             
     except Exception as e:
         print(f" Failed to run {script_name}: {e}")
@@ -44,8 +46,31 @@ def run_script(script_name, description):
     
     return True
 
-def main():
-    """Run the complete behavioral CAPTCHA detector workflow."""
+def run_stage(stage, description, *args):
+    """Run a pipeline stage in-process and display progress.
+    
+    Returns the stage's result, or None if the stage failed.
+    """
+    print_header(description)
+    
+    try:
+        result = stage(*args)
+    except Exception as e:
+        print(f" Failed to run {stage.__module__}: {e}")
+        return None
+    
+    if result is None:
+        print(f" Error in {stage.__module__}")
+        return None
+    
+    print(f" {stage.__module__} completed successfully!")
+    return result
+
+def main(isolated=False):
+    """Run the complete behavioral CAPTCHA detector workflow.
+    
+    With ``isolated=True`` every stage runs as its own script in a subprocess.
+    """
     
     print("""
     ╔══════════════════════════════════════════════════════════════╗
@@ -79,32 +104,53 @@ def main():
     
     print("\n📂 Project structure verified - all directories ready!")
     
+    descriptions = [
+        "Step 1: Generating synthetic mouse movement sessions",
+        "Step 2: Extracting behavioral features from mouse data",
+        "Step 3: Training Random Forest classifier",
+        "Step 4: Evaluating model performance",
+        "Step 5: Creating comprehensive visualizations"
+    ]
+    
+    if isolated:
+        for script_name, description in zip(required_files, descriptions):
+            if not run_script(script_name, description):
+                return
+        print_summary()
+        return
+    
+    # Import pipeline stages once so numpy/pandas/sklearn load a single time
+    import generate_sessions
+    import extract_features
+    import train_model
+    import test_predictions
+    import visualize_data
+    
     # Step 1: Generate session data
-    if not run_script('generate_sessions.py', 
-                     "Step 1: Generating synthetic mouse movement sessions"):
+    sessions = run_stage(generate_sessions.main, descriptions[0])
+    if sessions is None:
         return
     
-    # Step 2: Extract features
-    if not run_script('extract_features.py',
-                     "Step 2: Extracting behavioral features from mouse data"):
+    # Step 2: Extract features (reusing the in-memory sessions)
+    if run_stage(extract_features.main, descriptions[1], sessions) is None:
         return
     
     # Step 3: Train model
-    if not run_script('train_model.py',
-                     "Step 3: Training Random Forest classifier"):
+    if run_stage(train_model.main, descriptions[2]) is None:
         return
     
     # Step 4: Test predictions
-    if not run_script('test_predictions.py',
-                     "Step 4: Evaluating model performance"):
+    if run_stage(test_predictions.main, descriptions[3]) is None:
         return
     
     # Step 5: Create visualizations
-    if not run_script('visualize_data.py',
-                     "Step 5: Creating comprehensive visualizations"):
+    if run_stage(visualize_data.create_essential_visualizations, descriptions[4]) is None:
         return
     
-    # Final summary
+    print_summary()
+
+def print_summary():
+    """Print the final summary of generated artifacts and next steps."""
     print(f"\n{'='*60}")
     print("🎉 BEHAVIORAL CAPTCHA DETECTOR DEMO COMPLETED!")
     print(f"{'='*60}")
@@ -122,8 +168,8 @@ def main():
         print("   Model trained successfully")
         
     if os.path.exists('data/features.csv'):
-        import pandas as pd
-        df = pd.read_csv('data/features.csv')
+        from extract_features import load_features
+        df = load_features()
         print(f"   Dataset: {df.shape[0]} sessions, {df.shape[1]-2} features")
         print(f"   Features: {', '.join(df.columns[:-2])}")
     
@@ -142,4 +188,4 @@ def main():
     print("   natural mouse movement analysis!")
 
 if __name__ == "__main__":
-    main()
+    main(isolated='--isolated' in sys.argv[1:])
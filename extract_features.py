@@ -3,10 +3,52 @@ Feature extraction module for behavioral CAPTCHA detector.
 Converts raw mouse movement data into meaningful features for ML classification.
 """
 
-import json
+import math
 import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import os
+from functools import lru_cache
+from generate_sessions import load_sessions, movements_to_columns, sessions_to_columns
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the NumPy kernel is used instead
+    njit = None
+
+def _speed_stats_numpy(xs, ys, ts):
+    """Return (std, max) of point-to-point speeds using vectorized NumPy."""
+    dx, dy, dt = np.diff(xs), np.diff(ys), np.diff(ts) / 1000
+    moving = dt > 0  # avoid division by zero
+    speeds = np.hypot(dx[moving], dy[moving]) / dt[moving]
+    if not speeds.size:
+        return 0.0, 0.0
+    return speeds.std(), speeds.max()
+
+if njit is not None:
+    @njit('UniTuple(float64, 2)(float64[:], float64[:], float64[:])',
+          cache=True, fastmath=True, error_model='numpy')
+    def _speed_stats(xs, ys, ts):
+        """Return (std, max) of point-to-point speeds in one Welford pass without temporaries."""
+        mean, m2, peak, n = 0.0, 0.0, 0.0, 0
+        for i in range(1, len(xs)):
+            dt = (ts[i] - ts[i-1]) * 1e-3
+            if dt > 0:  # avoid division by zero
+                speed = math.hypot(xs[i] - xs[i-1], ys[i] - ys[i-1]) / dt
+                if speed > peak:
+                    peak = speed
+                n += 1
+                delta = speed - mean
+                mean += delta / n
+                m2 += delta * (speed - mean)
+        if n == 0:
+            return 0.0, 0.0
+        return math.sqrt(m2 / n), peak
+else:
+    _speed_stats = _speed_stats_numpy
 
 def extract_features(data, session_duration=None):
     """
@@ -20,62 +62,172 @@ def extract_features(data, session_duration=None):
         Dictionary containing extracted features for ML classification
     """
     # Extract coordinates and timestamps
-    xs, ys, ts = [p['x'] for p in data], [p['y'] for p in data], [p['t'] for p in data]
+    xs, ys, ts = movements_to_columns(data)
 
-    # Calculate speeds between consecutive points
-    speeds = []
-    for i in range(1, len(xs)):
-        dx, dy, dt = xs[i] - xs[i-1], ys[i] - ys[i-1], (ts[i] - ts[i-1]) / 1000
-        if dt > 0:  # avoid division by zero
-            speeds.append(((dx**2 + dy**2)**0.5) / dt)
+    # Calculate speed statistics between consecutive points
+    std_speed, max_speed = _speed_stats(xs, ys, ts)
 
     # Calculate session duration if not provided
     if session_duration is None:
         session_duration = (ts[-1] - ts[0]) / 1000 if len(ts) > 1 else 0
 
     return {
-        'std_speed': np.std(speeds),            # Human: high variance, Bot: low variance (65% difference)
-        'max_speed': np.max(speeds),            # Peak movement speed (65% difference)
-        'num_points': len(xs),                  # Total data points collected (58% difference)
-        'session_duration': session_duration    # Key differentiator: Bots faster, Humans slower (45% difference)
+        'std_speed': std_speed,                              # Human: high variance, Bot: low variance (65% difference)
+        'max_speed': max_speed,                              # Peak movement speed (65% difference)
+        'num_points': len(xs),                               # Total data points collected (58% difference)
+        'session_duration': session_duration                 # Key differentiator: Bots faster, Humans slower (45% difference)
+    }
+
+def extract_features_batch(xs, ys, ts, offsets, durations=None):
+    """
+    Extract behavioral features for many sessions in a single vectorized pass.
+    
+    Points of all sessions are stacked end to end and per-session statistics
+    are reduced over the session boundaries with ``np.ufunc.reduceat``.
+    Sessions without points get zero speeds and duration, like ``extract_features``.
+    
+    Args:
+        xs, ys, ts: Flat arrays of x, y coordinates and timestamps for all sessions
+        offsets: Start index of each session in the flat arrays, plus the total length
+        durations: Optional session durations in seconds (NaN where unknown)
+        
+    Returns:
+        Dictionary of NumPy arrays (one entry per session) keyed by feature name
+    """
+    offsets = np.asarray(offsets)
+    num_points = np.diff(offsets)
+    # reduceat can't express empty segments, so reduce over non-empty sessions only
+    nonempty = num_points > 0
+    starts, ends = offsets[:-1][nonempty], offsets[1:][nonempty] - 1
+
+    # Speed of the step ending at each point; the first point of a session has none
+    dt = np.zeros(len(ts))
+    dt[1:] = np.diff(ts) / 1000
+    dt[starts] = 0
+    moving = dt > 0  # avoid division by zero and cross-session steps
+    speeds = np.zeros(len(ts))
+    speeds[1:] = np.hypot(np.diff(xs), np.diff(ys))
+    speeds[moving] /= dt[moving]
+    speeds[~moving] = 0
+
+    n = np.add.reduceat(moving.astype(np.float64), starts)
+    total = np.add.reduceat(speeds, starts)
+    total_sq = np.add.reduceat(speeds * speeds, starts)
+    peak = np.maximum.reduceat(np.where(moving, speeds, -np.inf), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        var = np.maximum(total_sq / n - mean * mean, 0)
+    has_speed = n > 0
+    std_speed, max_speed, span = np.zeros(len(num_points)), np.zeros(len(num_points)), np.zeros(len(num_points))
+    std_speed[nonempty] = np.where(has_speed, np.sqrt(var), 0.0)
+    max_speed[nonempty] = np.where(has_speed, peak, 0.0)
+    span[nonempty] = (ts[ends] - ts[starts]) / 1000
+
+    # Prefer recorded session duration, falling back to the movement time span
+    if durations is None:
+        durations = span
+    else:
+        durations = np.where(np.isnan(durations), span, durations)
+
+    return {
+        'std_speed': std_speed,
+        'max_speed': max_speed,
+        'num_points': num_points,
+        'session_duration': durations
     }
 
 def load_data(file, label):
     """Load mouse movement data from JSON file and extract features."""
-    with open(file, 'r') as f:
-        raw = json.load(f)
+    with open(file, 'rb') as f:
+        raw = orjson.loads(f.read())
     features = extract_features(raw)
     features['label'] = label
     return features
 
-# Main execution
-if __name__ == "__main__":
+# Model input columns, in the order the model is trained and scored on
+FEATURES = ['std_speed', 'max_speed', 'num_points', 'session_duration']
+
+# Column types of data/features.csv, matching the frame written by main()
+FEATURE_COLUMN_TYPES = {
+    'std_speed': pa.float64(),
+    'max_speed': pa.float64(),
+    'num_points': pa.int32(),
+    'session_duration': pa.float64(),
+    'label': pa.int8(),
+    'session_id': pa.string()
+}
+
+@lru_cache(maxsize=1)
+def _read_parquet(parquet_file, mtime, columns):
+    """Read a Parquet file; ``mtime`` is part of the cache key so rewrites invalidate it."""
+    return pd.read_parquet(parquet_file, columns=list(columns) if columns else None, engine='pyarrow')
+
+def load_features(csv_file='data/features.csv', columns=None):
+    """
+    Load the extracted features table.
+    
+    The CSV is converted once to a Parquet copy next to it (rebuilt whenever the
+    CSV is newer), and the parsed frame is cached per file version, so repeated
+    calls in one process are free. Treat the returned DataFrame as read-only.
+    
+    Args:
+        csv_file: Path to the features CSV written by extract_features.py
+        columns: Optional subset of columns to load
+        
+    Returns:
+        pandas DataFrame of features
+    """
+    parquet_file = os.path.splitext(csv_file)[0] + '.parquet'
+    csv_mtime = os.path.getmtime(csv_file)
+    if not os.path.exists(parquet_file) or os.path.getmtime(parquet_file) < csv_mtime:
+        # Parse with Arrow's multithreaded reader and known types instead of inferring them
+        table = pacsv.read_csv(csv_file, convert_options=pacsv.ConvertOptions(column_types=FEATURE_COLUMN_TYPES))
+        pq.write_table(table, parquet_file, compression='zstd')
+    return _read_parquet(parquet_file, os.path.getmtime(parquet_file), tuple(columns) if columns else None)
+
+def main(sessions=None):
+    """Extract features for all sessions and save them to data/features.csv.
+    
+    Sessions already in memory (e.g. from generate_sessions.main) can be passed
+    directly to skip reading them back from disk.
+    """
     sessions_file = 'data/all_sessions.json'
+    columns_file = 'data/all_sessions.npz'
+    
+    # Prefer the columnar cache unless the JSON sessions are newer
+    use_columns = os.path.exists(columns_file) and (
+        not os.path.exists(sessions_file) or os.path.getmtime(columns_file) >= os.path.getmtime(sessions_file))
     
-    if not os.path.exists(sessions_file):
+    if sessions is None and not use_columns and not os.path.exists(sessions_file):
         print(f"Error: {sessions_file} not found. Please run generate_sessions.py first.")
-        exit(1)
+        return None
     
     print("Processing sessions to extract features...")
     
-    with open(sessions_file, 'r') as f:
-        sessions = json.load(f)
+    if sessions is not None:
+        columns = sessions_to_columns(sessions)
+    elif use_columns:
+        with np.load(columns_file) as npz:
+            columns = dict(npz)
+        print(f"Sessions loaded from {columns_file}")
+    else:
+        columns = sessions_to_columns(load_sessions(sessions_file))
     
-    features_data = []
-    for session in sessions:
-        movements = session['movements']
-        session_type = session['type']
-        session_duration = session['metadata'].get('session_duration', None)
-        
-        # Extract features including session_duration
-        features = extract_features(movements, session_duration)
-        features['label'] = 1 if session_type == 'bot' else 0
-        features['session_id'] = session['session_id']
-        features_data.append(features)
-    
-    # Create DataFrame and save
-    df = pd.DataFrame(features_data)
+    # Extract features (including session_duration) for all sessions at once
+    features = extract_features_batch(columns['x'], columns['y'], columns['t'],
+                                      columns['offsets'], columns['durations'])
+    df = pd.DataFrame({
+        'std_speed': features['std_speed'],
+        'max_speed': features['max_speed'],
+        'num_points': features['num_points'].astype(np.int32),
+        'session_duration': features['session_duration'],
+        'label': columns['labels'].astype(np.int8),
+        'session_id': columns['session_ids'].astype(object)
+    })
+    
+    # Save features
     df.to_csv('data/features.csv', index=False)
+    df.to_parquet('data/features.parquet', engine='pyarrow', compression='zstd')
     
     print(f"Features extracted and saved to data/features.csv")
     print(f"Dataset shape: {df.shape}")
@@ -93,4 +245,9 @@ if __name__ == "__main__":
     
     print(f"\nSample Features (first 5 rows):")
     print(df.head())
+    
+    return df
 
+if __name__ == "__main__":
+    if main() is None:
+        exit(1)
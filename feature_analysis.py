@@ -3,41 +3,46 @@ Feature Analysis Visualization for Behavioral CAPTCHA Detector.
 Creates comprehensive analysis of the 4 selected features and their discrimination power.
 """
 
-import pandas as pd
+import os
+import matplotlib
+if 'MPLBACKEND' not in os.environ:
+    matplotlib.use('Agg')  # headless: this script only writes a PNG
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+from extract_features import FEATURES, load_features
 
 def create_feature_analysis():
     """Create comprehensive feature analysis showing why these 4 features work."""
     
     # Load data
-    df = pd.read_csv('data/features.csv')
+    df = load_features()
     
     # Create optimized figure layout (3x2 instead of 2x3)
-    fig, axes = plt.subplots(3, 2, figsize=(15, 18))
+    fig, axes = plt.subplots(3, 2, figsize=(15, 18), constrained_layout=True)
     fig.suptitle('Feature Analysis: Why These 4 Features Detect Bots', fontsize=16, fontweight='bold')
     
-    features = ['std_speed', 'max_speed', 'num_points', 'session_duration']
+    features = FEATURES
     colors = ['#3498db', '#e74c3c']  # Blue for human, red for bot
     
+    # Split by class and compute per-class statistics once
+    values, labels = df[features].to_numpy(), df['label'].to_numpy()
+    human_values, bot_values = values[labels == 0], values[labels == 1]
+    human_means, human_stds = human_values.mean(0), human_values.std(0)
+    bot_means, bot_stds = bot_values.mean(0), bot_values.std(0)
+    discrimination_scores = np.abs(human_means - bot_means) / (human_stds + bot_stds) * 100
+    
     # Feature distributions (first 4 subplots)
     for i, feature in enumerate(features):
         row, col = i // 2, i % 2
         
-        human_data = df[df['label'] == 0][feature]
-        bot_data = df[df['label'] == 1][feature]
+        # Histogram over shared bin edges
+        bins = np.linspace(values[:, i].min(), values[:, i].max(), 16)
+        axes[row, col].hist(human_values[:, i], bins=bins, alpha=0.7, label='Human', color=colors[0], density=True)
+        axes[row, col].hist(bot_values[:, i], bins=bins, alpha=0.7, label='Bot', color=colors[1], density=True)
         
-        # Histogram
-        axes[row, col].hist(human_data, bins=15, alpha=0.7, label='Human', color=colors[0], density=True)
-        axes[row, col].hist(bot_data, bins=15, alpha=0.7, label='Bot', color=colors[1], density=True)
-        
-        # Statistics
-        human_mean, human_std = np.mean(human_data), np.std(human_data)
-        bot_mean, bot_std = np.mean(bot_data), np.std(bot_data)
-        
-        axes[row, col].axvline(human_mean, color=colors[0], linestyle='--', linewidth=2, alpha=0.8)
-        axes[row, col].axvline(bot_mean, color=colors[1], linestyle='--', linewidth=2, alpha=0.8)
+        # Class means
+        axes[row, col].axvline(human_means[i], color=colors[0], linestyle='--', linewidth=2, alpha=0.8)
+        axes[row, col].axvline(bot_means[i], color=colors[1], linestyle='--', linewidth=2, alpha=0.8)
         
         # Clean title without discrimination percentage
         axes[row, col].set_title(f'{feature.replace("_", " ").title()}\nHuman vs Bot Distribution', fontweight='bold')
@@ -75,16 +80,6 @@ def create_feature_analysis():
     ax_summary = axes[2, 1]
     ax_summary.axis('off')
     
-    # Calculate discrimination summary
-    discrimination_scores = []
-    for feature in features:
-        human_data = df[df['label'] == 0][feature]
-        bot_data = df[df['label'] == 1][feature]
-        human_mean, human_std = np.mean(human_data), np.std(human_data)
-        bot_mean, bot_std = np.mean(bot_data), np.std(bot_data)
-        discrimination = abs(human_mean - bot_mean) / (human_std + bot_std) * 100
-        discrimination_scores.append(discrimination)
-    
     # Create summary table
     summary_text = "DISCRIMINATION POWER SUMMARY\n\n"
     for i, (feature, score) in enumerate(zip(features, discrimination_scores)):
@@ -94,39 +89,28 @@ def create_feature_analysis():
     summary_text += f"\nAverage Discrimination: {np.mean(discrimination_scores):.1f}%\n"
     summary_text += f"Best Feature: {features[np.argmax(discrimination_scores)].replace('_', ' ').title()}\n"
     summary_text += f"Dataset: {len(df)} sessions\n"
-    summary_text += f"Human sessions: {len(df[df['label'] == 0])}\n"
-    summary_text += f"Bot sessions: {len(df[df['label'] == 1])}"
+    summary_text += f"Human sessions: {len(human_values)}\n"
+    summary_text += f"Bot sessions: {len(bot_values)}"
     
     ax_summary.text(0.05, 0.95, summary_text, transform=ax_summary.transAxes, 
                    fontsize=12, verticalalignment='top', fontfamily='monospace',
                    bbox=dict(boxstyle='round', facecolor='lightgray', alpha=0.8))
     
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.93)
-    
     # Save
     os.makedirs('plots', exist_ok=True)
-    plt.savefig('plots/feature_analysis.png', dpi=300, bbox_inches='tight')
+    fig.savefig('plots/feature_analysis.png', dpi=300)
     print(" Feature analysis saved to plots/feature_analysis.png")
-    plt.show()
+    plt.close(fig)
     
     # Print insights
     print("\n Feature Analysis Insights:")
     print("=" * 50)
     
-    for feature in features:
-        human_data = df[df['label'] == 0][feature]
-        bot_data = df[df['label'] == 1][feature]
-        
-        human_mean, human_std = np.mean(human_data), np.std(human_data)
-        bot_mean, bot_std = np.mean(bot_data), np.std(bot_data)
-        
-        discrimination = abs(human_mean - bot_mean) / (human_std + bot_std) * 100
-        
+    for i, feature in enumerate(features):
         print(f"\n{feature.replace('_', ' ').title()}:")
-        print(f"  Human: μ={human_mean:.1f}, σ={human_std:.1f}")
-        print(f"  Bot:   μ={bot_mean:.1f}, σ={bot_std:.1f}")
-        print(f"  Discrimination: {discrimination:.1f}%")
+        print(f"  Human: μ={human_means[i]:.1f}, σ={human_stds[i]:.1f}")
+        print(f"  Bot:   μ={bot_means[i]:.1f}, σ={bot_stds[i]:.1f}")
+        print(f"  Discrimination: {discrimination_scores[i]:.1f}%")
 
 if __name__ == "__main__":
     create_feature_analysis()
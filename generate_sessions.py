@@ -3,118 +3,149 @@ Generate comprehensive mouse movement sessions for behavioral CAPTCHA detection.
 Creates 50 bot sessions and 50 human sessions with realistic patterns and metadata.
 """
 
-import json
-import random
-import math
+import os
 import time
+import numpy as np
+import orjson
 from datetime import datetime, timedelta
+from functools import lru_cache
+from multiprocessing import Pool
 
-def generate_human_session(session_id, metadata=None):
-    """Generate realistic human mouse movement data with natural variations."""
-    data = []
-    x, y = random.randint(50, 300), random.randint(50, 300)
-    start_time = int(time.time() * 1000) + random.randint(-10000, 10000)
+def _pack_movements(xs, ys, ts):
+    """Pack integer x, y, t arrays into the list-of-dicts movement format."""
+    return [{'x': x, 'y': y, 't': t} for x, y, t in zip(xs.tolist(), ys.tolist(), ts.tolist())]
+
+def movements_to_columns(points, n=None):
+    """Transpose {'x', 'y', 't'} points into x, y and t float64 arrays.
+    
+    ``points`` may be any iterable when its length ``n`` is given.
+    """
+    if n is None:
+        n = len(points)
+    xs, ys, ts = np.empty(n), np.empty(n), np.empty(n)
+    for i, p in enumerate(points):
+        xs[i], ys[i], ts[i] = p['x'], p['y'], p['t']
+    return xs, ys, ts
+
+def _choice(rng, options, size=None):
+    """Pick element(s) of a Python list, keeping their native type."""
+    if size is None:
+        return options[rng.integers(len(options))]
+    return [options[i] for i in rng.integers(len(options), size=size)]
+
+# Session start-hour distributions, as CDFs for inverse-transform sampling
+_HUMAN_HOUR_WEIGHTS = [1,1,1,1,1,2,3,5,8,10,12,15,15,15,12,10,8,12,15,18,15,10,5,2]
+_BOT_HOUR_WEIGHTS = [8,10,12,10,8,5,3,2,3,5,7,8,8,8,8,8,8,8,10,8,8,8,10,10]
+HUMAN_HOUR_CDF = np.cumsum(_HUMAN_HOUR_WEIGHTS) / sum(_HUMAN_HOUR_WEIGHTS)
+BOT_HOUR_CDF = np.cumsum(_BOT_HOUR_WEIGHTS) / sum(_BOT_HOUR_WEIGHTS)
+
+def _make_session(session_type, session_id, metadata, xs, ys, ts):
+    """Assemble the session record stored in the JSON files."""
+    return {
+        'session_id': f'{session_type}_{session_id:03d}',
+        'type': session_type,
+        'metadata': metadata,
+        'movements': _pack_movements(xs, ys, ts)
+    }
+
+def generate_human_movements(rng):
+    """Generate human mouse movements; returns (xs, ys, ts, session_duration)."""
+    x, y = rng.integers(50, 301), rng.integers(50, 301)
+    start_time = int(time.time() * 1000) + int(rng.integers(-10000, 10001))
     
     # Human characteristics: variable movement, pauses, direction changes
-    num_points = random.randint(80, 200)
+    num_points = int(rng.integers(80, 201))
     pause_prob, direction_prob = 0.1, 0.15
-    current_time = start_time
-    velocity_x, velocity_y = random.uniform(-2, 2), random.uniform(-2, 2)
-    
-    for i in range(num_points):
-        # Natural variations and tremor
-        if random.random() < direction_prob:
-            velocity_x += random.uniform(-1, 1)
-            velocity_y += random.uniform(-1, 1)
-        
-        jitter_x, jitter_y = random.uniform(-0.5, 0.5), random.uniform(-0.5, 0.5)
-        x += velocity_x + jitter_x
-        y += velocity_y + jitter_y
-        x, y = max(0, min(800, x)), max(0, min(600, y))
-        
-        # Human-like timing with pauses
-        time_delta = random.randint(200, 800) if random.random() < pause_prob else random.randint(8, 50)
-        current_time += time_delta
-        
-        data.append({'x': round(x), 'y': round(y), 't': current_time})
+    velocity_x, velocity_y = rng.uniform(-2, 2), rng.uniform(-2, 2)
     
-    # Calculate session duration based on actual movement times
-    session_duration = (current_time - start_time) / 1000  # Convert to seconds
+    # Natural variations and tremor: occasional direction changes plus per-point jitter
+    direction_change = rng.random(num_points) < direction_prob
+    velocity_xs = velocity_x + np.where(direction_change, rng.uniform(-1, 1, num_points), 0).cumsum()
+    velocity_ys = velocity_y + np.where(direction_change, rng.uniform(-1, 1, num_points), 0).cumsum()
+    jitter_x, jitter_y = rng.uniform(-0.5, 0.5, num_points), rng.uniform(-0.5, 0.5, num_points)
+    xs = np.clip(x + (velocity_xs + jitter_x).cumsum(), 0, 800).round().astype(int)
+    ys = np.clip(y + (velocity_ys + jitter_y).cumsum(), 0, 600).round().astype(int)
     
-    session = {
-        'session_id': f'human_{session_id:03d}',
-        'type': 'human',
-        'metadata': metadata or generate_session_metadata('human', session_duration),
-        'movements': data
-    }
+    # Human-like timing with pauses
+    pauses = rng.random(num_points) < pause_prob
+    time_deltas = np.where(pauses, rng.integers(200, 801, num_points), rng.integers(8, 51, num_points))
+    ts = start_time + time_deltas.cumsum()
+    
+    # Calculate session duration based on actual movement times
+    session_duration = float(ts[-1] - start_time) / 1000  # Convert to seconds
     
-    return session
+    return xs, ys, ts, session_duration
 
-def generate_bot_session(session_id, metadata=None):
-    """Generate bot-like mouse movement data with mechanical patterns."""
-    data = []
-    pattern_type = random.choice(['linear', 'curve', 'step', 'zigzag'])
-    x, y = random.randint(100, 200), random.randint(100, 200)
-    start_time = int(time.time() * 1000) + random.randint(-10000, 10000)
+def generate_human_session(session_id, metadata=None, seed=None):
+    """Generate realistic human mouse movement data with natural variations."""
+    rng = np.random.default_rng(seed)
+    xs, ys, ts, session_duration = generate_human_movements(rng)
+    return _make_session('human', session_id, metadata or generate_session_metadata('human', session_duration, rng), xs, ys, ts)
+
+def generate_bot_movements(rng):
+    """Generate bot mouse movements; returns (xs, ys, ts, session_duration)."""
+    pattern_type = _choice(rng, ['linear', 'curve', 'step', 'zigzag'])
+    x, y = rng.integers(100, 201), rng.integers(100, 201)
+    start_time = int(time.time() * 1000) + int(rng.integers(-10000, 10001))
     
     # Bot characteristics: shorter paths, consistent timing
-    num_points = random.randint(30, 80)
-    time_interval = random.randint(50, 150)
+    num_points = int(rng.integers(30, 81))
+    time_interval = int(rng.integers(50, 151))
+    i = np.arange(num_points)
+    ts = start_time + i * time_interval
     
     if pattern_type == 'linear':
-        end_x, end_y = random.randint(300, 600), random.randint(300, 500)
-        for i in range(num_points):
-            progress = i / (num_points - 1)
-            curr_x = int(x + (end_x - x) * progress)
-            curr_y = int(y + (end_y - y) * progress)
-            data.append({'x': curr_x, 'y': curr_y, 't': start_time + i * time_interval})
+        end_x, end_y = rng.integers(300, 601), rng.integers(300, 501)
+        progress = np.linspace(0, 1, num_points)
+        xs = (x + (end_x - x) * progress).astype(int)
+        ys = (y + (end_y - y) * progress).astype(int)
     
     elif pattern_type == 'curve':
-        control_x, control_y = random.randint(200, 400), random.randint(200, 400)
-        end_x, end_y = random.randint(400, 600), random.randint(300, 500)
-        for i in range(num_points):
-            t = i / (num_points - 1)
-            curve_x = (1-t)**2 * x + 2*(1-t)*t * control_x + t**2 * end_x
-            curve_y = (1-t)**2 * y + 2*(1-t)*t * control_y + t**2 * end_y
-            data.append({'x': int(curve_x), 'y': int(curve_y), 't': start_time + i * time_interval})
+        control_x, control_y = rng.integers(200, 401), rng.integers(200, 401)
+        end_x, end_y = rng.integers(400, 601), rng.integers(300, 501)
+        t = np.linspace(0, 1, num_points)
+        xs = ((1-t)**2 * x + 2*(1-t)*t * control_x + t**2 * end_x).astype(int)
+        ys = ((1-t)**2 * y + 2*(1-t)*t * control_y + t**2 * end_y).astype(int)
     
     elif pattern_type == 'step':
-        for i in range(num_points):
-            if i % 10 == 0:
-                x += random.choice([20, -20, 0])
-                y += random.choice([20, -20, 0])
-            data.append({'x': x, 'y': y, 't': start_time + i * time_interval})
+        # Jump by a fixed step every 10 points and hold position in between
+        num_steps = (num_points + 9) // 10
+        xs = x + np.repeat(np.cumsum(rng.choice([20, -20, 0], num_steps)), 10)[:num_points]
+        ys = y + np.repeat(np.cumsum(rng.choice([20, -20, 0], num_steps)), 10)[:num_points]
     
     else:  # zigzag
-        amplitude, frequency = random.randint(20, 50), random.uniform(0.1, 0.3)
-        for i in range(num_points):
-            offset = amplitude * math.sin(i * frequency)
-            data.append({'x': int(x + i * 5), 'y': int(y + offset), 't': start_time + i * time_interval})
+        amplitude, frequency = rng.integers(20, 51), rng.uniform(0.1, 0.3)
+        xs = x + i * 5
+        ys = (y + amplitude * np.sin(i * frequency)).astype(int)
     
     # Calculate session duration - bots are faster and more consistent
-    session_duration = (data[-1]['t'] - start_time) / 1000 if data else 0.5
-    
-    session = {
-        'session_id': f'bot_{session_id:03d}',
-        'type': 'bot',
-        'metadata': metadata or generate_session_metadata('bot', session_duration),
-        'movements': data
-    }
+    session_duration = float(ts[-1] - start_time) / 1000
     
-    return session
+    return xs, ys, ts, session_duration
+
+def generate_bot_session(session_id, metadata=None, seed=None):
+    """Generate bot-like mouse movement data with mechanical patterns."""
+    rng = np.random.default_rng(seed)
+    xs, ys, ts, session_duration = generate_bot_movements(rng)
+    return _make_session('bot', session_id, metadata or generate_session_metadata('bot', session_duration, rng), xs, ys, ts)
 
-def generate_session_metadata(session_type, session_duration):
+def generate_session_metadata(session_type, session_duration, rng=None):
     """Generate realistic metadata for a session including calculated session_duration."""
+    return generate_all_metadata(session_type, [session_duration], rng)[0]
+
+def generate_all_metadata(session_type, session_durations, rng=None):
+    """Generate metadata for a batch of sessions, drawing every field in bulk."""
+    rng = rng if rng is not None else np.random.default_rng()
+    n = len(session_durations)
     
-    # Time distribution weights
-    hour_weights = [1,1,1,1,1,2,3,5,8,10,12,15,15,15,12,10,8,12,15,18,15,10,5,2] if session_type == 'human' else [8,10,12,10,8,5,3,2,3,5,7,8,8,8,8,8,8,8,10,8,8,8,10,10]
-    
-    hour = random.choices(range(24), weights=hour_weights)[0]
-    minute, second = random.randint(0, 59), random.randint(0, 59)
+    # Time of day from the per-type hour distribution
+    hour_cdf = HUMAN_HOUR_CDF if session_type == 'human' else BOT_HOUR_CDF
+    hours = np.searchsorted(hour_cdf, rng.random(n), side='right').tolist()
+    minutes, seconds = rng.integers(0, 60, n).tolist(), rng.integers(0, 60, n).tolist()
     
-    # Generate date within last 30 days
-    base_date = datetime.now() - timedelta(days=random.randint(0, 30))
-    session_time = base_date.replace(hour=hour, minute=minute, second=second)
+    # Generate dates within last 30 days
+    now = datetime.now()
+    days_ago = rng.integers(0, 31, n).tolist()
     
     # Device configurations
     browsers = ['Chrome', 'Firefox', 'Safari', 'Edge']
@@ -123,47 +154,136 @@ def generate_session_metadata(session_type, session_duration):
     if session_type == 'human':
         screen_resolutions = ['1920x1080', '1366x768', '1440x900', '1536x864', '1280x720']
         devices = ['Desktop', 'Laptop', 'Tablet', 'Mobile']
-        user_agent_entropy = random.uniform(2.0, 8.0)
+        user_agent_entropy = rng.uniform(2.0, 8.0, n)
     else:
         screen_resolutions = ['1920x1080', '1366x768', '1024x768']
         devices = ['Desktop', 'Virtual Machine']
-        user_agent_entropy = random.uniform(1.0, 3.0)
+        user_agent_entropy = rng.uniform(1.0, 3.0, n)
+    
+    fields = zip(hours, minutes, seconds, days_ago,
+                 _choice(rng, browsers, n), _choice(rng, os_list, n),
+                 _choice(rng, screen_resolutions, n), _choice(rng, devices, n),
+                 _choice(rng, ['US-East', 'US-West', 'EU-West', 'Asia-Pacific'], n),
+                 session_durations, user_agent_entropy.tolist())
+    
+    metadata = []
+    for hour, minute, second, days, browser, os_name, resolution, device, region, duration, entropy in fields:
+        session_time = (now - timedelta(days=days)).replace(hour=hour, minute=minute, second=second)
+        metadata.append({
+            'timestamp': session_time.isoformat(),
+            'time_of_day': f"{hour:02d}:{minute:02d}:{second:02d}",
+            'day_of_week': session_time.strftime('%A'),
+            'browser': browser,
+            'os': os_name,
+            'screen_resolution': resolution,
+            'device_type': device,
+            'session_duration': round(duration, 3),  # Actual calculated duration in seconds
+            'ip_region': region,
+            'user_agent_entropy': round(entropy, 2)
+        })
+    
+    return metadata
+
+@lru_cache(maxsize=1)
+def _read_sessions(sessions_file, mtime):
+    """Parse a sessions JSON file; ``mtime`` is part of the cache key so rewrites invalidate it."""
+    with open(sessions_file, 'rb') as f:
+        return orjson.loads(f.read())
+
+def load_sessions(sessions_file='data/all_sessions.json'):
+    """Load saved sessions, parsing each version of the file only once per process.
+    
+    The returned list is shared between callers; treat it as read-only.
+    """
+    return _read_sessions(sessions_file, os.path.getmtime(sessions_file))
+
+@lru_cache(maxsize=1)
+def _partition_sessions(sessions_file, mtime):
+    """Split a sessions file by type; ``mtime`` is part of the cache key so rewrites invalidate it."""
+    sessions = _read_sessions(sessions_file, mtime)
+    humans = [s for s in sessions if s['type'] == 'human']
+    bots = [s for s in sessions if s['type'] == 'bot']
+    human_durations = np.array([s['metadata']['session_duration'] for s in humans])
+    bot_durations = np.array([s['metadata']['session_duration'] for s in bots])
+    return humans, bots, human_durations, bot_durations
+
+def partition_sessions(sessions_file='data/all_sessions.json'):
+    """Return (humans, bots, human_durations, bot_durations) for the saved sessions.
+    
+    The split is computed once per file version and shared between callers;
+    treat the returned lists and arrays as read-only.
+    """
+    return _partition_sessions(sessions_file, os.path.getmtime(sessions_file))
+
+def sessions_to_columns(sessions):
+    """Flatten sessions into columnar NumPy arrays (the layout of data/all_sessions.npz)."""
+    n = len(sessions)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    labels = np.empty(n, dtype=np.int8)
+    session_ids = np.empty(n, dtype=object)
+    durations = np.empty(n)
+    for i, s in enumerate(sessions):
+        offsets[i + 1] = offsets[i] + len(s['movements'])
+        labels[i] = 1 if s['type'] == 'bot' else 0
+        session_ids[i] = s['session_id']
+        durations[i] = s.get('metadata', {}).get('session_duration', np.nan)
+    
+    xs, ys, ts = movements_to_columns((p for s in sessions for p in s['movements']), offsets[-1])
     
     return {
-        'timestamp': session_time.isoformat(),
-        'time_of_day': f"{hour:02d}:{minute:02d}:{second:02d}",
-        'day_of_week': session_time.strftime('%A'),
-        'browser': random.choice(browsers),
-        'os': random.choice(os_list),
-        'screen_resolution': random.choice(screen_resolutions),
-        'device_type': random.choice(devices),
-        'session_duration': round(session_duration, 3),  # Actual calculated duration in seconds
-        'ip_region': random.choice(['US-East', 'US-West', 'EU-West', 'Asia-Pacific']),
-        'user_agent_entropy': round(user_agent_entropy, 2)
+        'x': xs,
+        'y': ys,
+        't': ts,
+        'offsets': offsets,
+        'labels': labels,
+        'session_ids': session_ids.astype(str),
+        'durations': durations
     }
 
+def _assemble_sessions(session_type, results, rng):
+    """Turn (xs, ys, ts, session_duration) results into sessions with batch-drawn metadata."""
+    metadata = generate_all_metadata(session_type, [duration for *_, duration in results], rng)
+    return [_make_session(session_type, i + 1, meta, xs, ys, ts)
+            for i, (meta, (xs, ys, ts, _)) in enumerate(zip(metadata, results))]
+
 def main():
-    """Generate all sessions and save to files."""
+    """Generate all sessions, save them to files and return the combined list."""
     print("Generating mouse movement sessions...")
     
-    # Generate sessions
-    print("Generating 50 human sessions...")
-    human_sessions = [generate_human_session(i + 1) for i in range(50)]
-    print("Generating 50 bot sessions...")
-    bot_sessions = [generate_bot_session(i + 1) for i in range(50)]
+    # Independent random streams so parallel workers never share a seed
+    root_seed = np.random.SeedSequence()
+    human_seeds, bot_seeds = root_seed.spawn(50), root_seed.spawn(50)
+    
+    rng = np.random.default_rng(root_seed.spawn(1)[0])
+    
+    # Generate movements in parallel (each session is independent)
+    with Pool() as pool:
+        print("Generating 50 human sessions...")
+        human_results = pool.map(generate_human_movements, [np.random.default_rng(seed) for seed in human_seeds])
+        print("Generating 50 bot sessions...")
+        bot_results = pool.map(generate_bot_movements, [np.random.default_rng(seed) for seed in bot_seeds])
+    
+    # Draw metadata for each session type in one batch
+    human_sessions = _assemble_sessions('human', human_results, rng)
+    bot_sessions = _assemble_sessions('bot', bot_results, rng)
     
     # Save sessions
     print("Saving sessions to files...")
-    with open('data/human_sessions.json', 'w') as f:
-        json.dump(human_sessions, f, indent=2)
-    with open('data/bot_sessions.json', 'w') as f:
-        json.dump(bot_sessions, f, indent=2)
+    with open('data/human_sessions.json', 'wb') as f:
+        f.write(orjson.dumps(human_sessions))
+    with open('data/bot_sessions.json', 'wb') as f:
+        f.write(orjson.dumps(bot_sessions))
     
     # Combined and shuffled dataset
     all_sessions = human_sessions + bot_sessions
-    random.shuffle(all_sessions)
-    with open('data/all_sessions.json', 'w') as f:
-        json.dump(all_sessions, f, indent=2)
+    order = rng.permutation(len(all_sessions))
+    all_sessions = [all_sessions[i] for i in order]
+    # Combined file stays indented for debugging
+    with open('data/all_sessions.json', 'wb') as f:
+        f.write(orjson.dumps(all_sessions, option=orjson.OPT_INDENT_2))
+    
+    # Columnar copy so feature extraction can skip JSON parsing
+    np.savez('data/all_sessions.npz', **sessions_to_columns(all_sessions))
     
     # Statistics
     human_durations = [s['metadata']['session_duration'] for s in human_sessions]
@@ -179,7 +299,9 @@ def main():
     print(f"\nMovement Points:")
     print(f"  Human avg: {sum(human_movements)/len(human_movements):.1f}")
     print(f"  Bot avg: {sum(bot_movements)/len(bot_movements):.1f}")
-    print(f"\nFiles created: data/human_sessions.json, data/bot_sessions.json, data/all_sessions.json")
+    print(f"\nFiles created: data/human_sessions.json, data/bot_sessions.json, data/all_sessions.json, data/all_sessions.npz")
+    
+    return all_sessions
 
 if __name__ == "__main__":
     main()
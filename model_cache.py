@@ -0,0 +1,28 @@
+"""
+Shared model loading for behavioral CAPTCHA detector.
+Keeps the trained model in memory so repeated predictions don't re-read the pickle.
+"""
+
+import joblib
+import os
+from functools import lru_cache
+
+MODEL_FILE = 'models/mouse_model.pkl'
+
+@lru_cache(maxsize=4)
+def _read_model(path, mtime):
+    """Unpickle a saved model; ``mtime`` is part of the cache key so retraining invalidates it."""
+    saved = joblib.load(path)
+    print(f"Model loaded from {path}")
+    if not isinstance(saved, dict):  # older files hold the bare estimator
+        saved = {'model': saved}
+    saved.setdefault('test_session_ids', None)
+    return saved
+
+def load_model_bundle(path=MODEL_FILE):
+    """Return the saved {'model', 'test_session_ids'} bundle, loading it once per process."""
+    return _read_model(path, os.path.getmtime(path))
+
+def get_model(path=MODEL_FILE):
+    """Return the trained classifier, loading it once per process."""
+    return load_model_bundle(path)['model']
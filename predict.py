@@ -3,35 +3,58 @@ Prediction module for behavioral CAPTCHA detector.
 Uses trained ML model to classify mouse movements as human or bot.
 """
 
-import joblib
 import json
 import numpy as np
+import pandas as pd
 import os
-import warnings
-from extract_features import extract_features
+from extract_features import FEATURES, extract_features, extract_features_batch
+from generate_sessions import movements_to_columns, partition_sessions
+from model_cache import get_model
 
-# Suppress sklearn feature name warnings
-warnings.filterwarnings('ignore', message='X does not have valid feature names')
+def model_input(model, X):
+    """Shape a float32 feature matrix (columns in FEATURES order) for ``model``.
+    
+    Current models are fitted on bare arrays; older ones were fitted on a
+    DataFrame and expect the same column names back.
+    """
+    if hasattr(model, 'feature_names_in_'):
+        return pd.DataFrame(X, columns=FEATURES)
+    return X
 
-def predict_movement(data_file, model_file='mouse_model.pkl'):
-    """Predict if mouse movement data is from human or bot."""
+def predict_from_features(features, model_file='mouse_model.pkl'):
+    """Predict human or bot from an extracted feature dictionary."""
+    # Validate features
+    for feature in FEATURES:
+        if feature not in features:
+            print(f"Error: Missing required feature: {feature}")
+            return None, None
+    
     # Load trained model
     try:
-        model = joblib.load(f'models/{model_file}')
-        print(f"Model loaded from models/{model_file}")
+        model = get_model(f'models/{model_file}')
     except FileNotFoundError:
         print(f"Error: Model file models/{model_file} not found. Please train the model first.")
         return None, None
     
-    # Load test data
-    try:
-        with open(data_file, 'r') as f:
-            data = json.load(f)
-        print(f"Test data loaded from {data_file}")
-    except FileNotFoundError:
-        print(f"Error: Data file {data_file} not found.")
-        return None, None
+    # Prepare feature vector for prediction (best 4 features)
+    X = np.asarray([[features[name] for name in FEATURES]], dtype=np.float32)
+    
+    # Make prediction
+    probability = model.predict_proba(model_input(model, X))[0]
+    prediction = model.classes_[probability.argmax()]
     
+    # Get confidence scores
+    human_confidence, bot_confidence = probability[0] * 100, probability[1] * 100
+    
+    print(f"\nPrediction Results:")
+    print(f"  Classification: {'Bot' if prediction == 1 else 'Human'}")
+    print(f"  Human Confidence: {human_confidence:.1f}%")
+    print(f"  Bot Confidence: {bot_confidence:.1f}%")
+    
+    return prediction, max(human_confidence, bot_confidence)
+
+def _session_features(data):
+    """Extract features from a session dict or movement list; None if invalid."""
     # Extract features (handle both old and new formats)
     if 'movements' in data:
         movements = data['movements']
@@ -43,48 +66,101 @@ def predict_movement(data_file, model_file='mouse_model.pkl'):
     # Validate movements data
     if not movements or len(movements) < 2:
         print("Error: Invalid movement data: Need at least 2 movement points")
-        return None, None
+        return None
     
-    features = extract_features(movements, session_duration)
+    return extract_features(movements, session_duration)
+
+def predict_session(data, model_file='mouse_model.pkl'):
+    """Predict if already-parsed mouse movement data is from human or bot.
     
-    # Validate features
-    required_features = ['std_speed', 'max_speed', 'num_points', 'session_duration']
-    for feature in required_features:
-        if feature not in features:
-            print(f"Error: Missing required feature: {feature}")
-            return None, None
+    Accepts either a session dict (with 'movements' and optional 'metadata')
+    or a bare list of movement points.
+    """
+    features = _session_features(data)
+    if features is None:
+        return None, None
     
     print(f"\nExtracted Features:")
     for key, value in features.items():
         print(f"  {key}: {value:.3f}")
     
-    # Prepare feature vector for prediction (best 4 features)
-    X = [[features['std_speed'], features['max_speed'], 
-          features['num_points'], features['session_duration']]]
+    return predict_from_features(features, model_file)
+
+def predict_movement(data_file, model_file='mouse_model.pkl'):
+    """Predict if mouse movement data stored in a JSON file is from human or bot."""
+    # Load test data
+    try:
+        with open(data_file, 'r') as f:
+            data = json.load(f)
+        print(f"Test data loaded from {data_file}")
+    except FileNotFoundError:
+        print(f"Error: Data file {data_file} not found.")
+        return None, None
     
-    # Make prediction
-    prediction = model.predict(X)[0]
-    probability = model.predict_proba(X)[0]
+    return predict_session(data, model_file)
+
+def predict_movement_batch(sessions, model_file='mouse_model.pkl'):
+    """Predict human or bot for several in-memory sessions with a single model call.
     
-    # Get confidence scores
-    human_confidence, bot_confidence = probability[0] * 100, probability[1] * 100
+    Each entry may be a session dict or a bare list of movement points. Features
+    are extracted in one vectorized pass and scored with one predict_proba call.
     
-    print(f"\nPrediction Results:")
-    print(f"  Classification: {'Bot' if prediction == 1 else 'Human'}")
-    print(f"  Human Confidence: {human_confidence:.1f}%")
-    print(f"  Bot Confidence: {bot_confidence:.1f}%")
+    Returns arrays of predicted labels and confidences (in %), or (None, None) on failure.
+    """
+    if not sessions:
+        print("Error: No sessions to predict")
+        return None, None
     
-    return prediction, max(human_confidence, bot_confidence)
+    movements = [data['movements'] if 'movements' in data else data for data in sessions]
+    if any(not points or len(points) < 2 for points in movements):
+        print("Error: Invalid movement data: Need at least 2 movement points")
+        return None, None
+    
+    try:
+        model = get_model(f'models/{model_file}')
+    except FileNotFoundError:
+        print(f"Error: Model file models/{model_file} not found. Please train the model first.")
+        return None, None
+    
+    # Stack every session's points and extract all feature rows at once
+    xs, ys, ts = movements_to_columns([p for points in movements for p in points])
+    offsets = np.cumsum([0] + [len(points) for points in movements])
+    durations = np.array([data.get('metadata', {}).get('session_duration', np.nan) if 'movements' in data else np.nan
+                          for data in sessions], dtype=np.float64)
+    features = extract_features_batch(xs, ys, ts, offsets, durations)
+    
+    # One (N, 4) matrix and one predict_proba call for all sessions
+    X = np.column_stack([features[name] for name in FEATURES]).astype(np.float32)
+    probabilities = model.predict_proba(model_input(model, X))
+    predictions = model.classes_[probabilities.argmax(1)]
+    
+    return predictions, probabilities.max(1) * 100
+
+def predict_batch(data_files, model_file='mouse_model.pkl'):
+    """Predict human or bot for several JSON movement files with a single model call.
+    
+    Returns arrays of predicted labels and confidences (in %), or (None, None) on failure.
+    """
+    sessions = []
+    for data_file in data_files:
+        try:
+            with open(data_file, 'r') as f:
+                sessions.append(json.load(f))
+        except FileNotFoundError:
+            print(f"Error: Data file {data_file} not found.")
+            return None, None
+    
+    return predict_movement_batch(sessions, model_file)
+
 if __name__ == "__main__":
     # Create test data file using one of the bot sessions
     test_file = 'test_data.json'
     if not os.path.exists(test_file):
         try:
-            with open('data/all_sessions.json', 'r') as f:
-                all_sessions = json.load(f)
+            bots = partition_sessions()[1]
             
-            # Find the first bot session
-            bot_session = next((s for s in all_sessions if s['type'] == 'bot'), None)
+            # Use the first bot session
+            bot_session = bots[0] if bots else None
             
             if bot_session:
                 with open(test_file, 'w') as f:
@@ -3,84 +3,106 @@ Comprehensive test script for model evaluation with detailed metrics.
 Tests predictions and provides ROC-AUC, precision/recall analysis including session_duration.
 """
 
-import json
-import pandas as pd
 import numpy as np
 from sklearn.metrics import accuracy_score, roc_auc_score, classification_report, confusion_matrix
-from predict import predict_movement
-import joblib
+from sklearn.model_selection import train_test_split
+from predict import model_input, predict_movement_batch
+from extract_features import FEATURES, load_features
+from generate_sessions import load_sessions, partition_sessions
+from model_cache import load_model_bundle
 
-def comprehensive_evaluation():
-    """Perform comprehensive evaluation on test data with all metrics."""
-    try:
-        print("Loading data and model...")
-        
-        # Load sessions and model
-        with open('data/all_sessions.json', 'r') as f:
-            all_sessions = json.load(f)
-        model = joblib.load('models/mouse_model.pkl')
-        features_df = pd.read_csv('data/features.csv')
-        
-        print(f"Evaluating on {len(all_sessions)} sessions...")
-        
-        # Prepare data (now includes session_duration)
-        X = features_df.drop(columns=['label', 'session_id'])
-        y_true = features_df['label'].values
-        
-        print("Making predictions...")
-        # Get predictions and probabilities
-        y_pred = model.predict(X)
-        y_pred_proba = model.predict_proba(X)[:, 1]
-        
-        print("Calculating metrics...")
-        # Calculate metrics
-        accuracy = accuracy_score(y_true, y_pred)
-        roc_auc = roc_auc_score(y_true, y_pred_proba)
-        
-        print(f"\nCOMPREHENSIVE EVALUATION RESULTS:")
-        print(f"=" * 50)
-        print(f"Total samples: {len(y_true)}")
-        print(f"Accuracy: {accuracy:.3f}")
-        print(f"ROC-AUC: {roc_auc:.3f}")
-        print(f"Features used: {list(X.columns)}")
-        
-        print(f"\nDetailed Classification Report:")
-        print(classification_report(y_true, y_pred, target_names=['Human', 'Bot']))
-        
-        # Confusion Matrix
-        cm = confusion_matrix(y_true, y_pred)
-        print(f"\nConfusion Matrix:")
-        print(f"              Predicted")
-        print(f"              Human  Bot")
-        print(f"Actual Human    {cm[0,0]:3d}  {cm[0,1]:3d}")
-        print(f"       Bot      {cm[1,0]:3d}  {cm[1,1]:3d}")
-        
-        # Feature importance analysis
-        feature_importance = pd.DataFrame({
-            'feature': X.columns,
-            'importance': model.feature_importances_
-        }).sort_values('importance', ascending=False)
-        
-        print(f"\nFeature Importance Ranking:")
-        for i, (_, row) in enumerate(feature_importance.iterrows(), 1):
-            print(f"{i}. {row['feature']}: {row['importance']:.3f}")
-        
-        # Performance by session type
-        human_accuracy = accuracy_score(y_true[y_true == 0], y_pred[y_true == 0])
-        bot_accuracy = accuracy_score(y_true[y_true == 1], y_pred[y_true == 1])
-        
-        print(f"\nPer-Class Performance:")
-        print(f"Human detection accuracy: {human_accuracy:.3f}")
-        print(f"Bot detection accuracy: {bot_accuracy:.3f}")
-        
-        return accuracy, roc_auc
-        
-    except KeyboardInterrupt:
-        print("\n\nEvaluation interrupted by user (Ctrl+C). Exiting gracefully...")
-        return None, None
-    except Exception as e:
-        print(f"\nError during evaluation: {e}")
-        return None, None
+def print_confusion_matrix(cm):
+    """Print a 2x2 Human/Bot confusion matrix."""
+    print(f"\nConfusion Matrix:")
+    print(f"              Predicted")
+    print(f"              Human  Bot")
+    print(f"Actual Human    {cm[0,0]:3d}  {cm[0,1]:3d}")
+    print(f"       Bot      {cm[1,0]:3d}  {cm[1,1]:3d}")
+
+def comprehensive_evaluation(eval_sample_size=None):
+    """Perform comprehensive evaluation on test data with all metrics.
+    
+    If ``eval_sample_size`` is given and the evaluation set is larger, the
+    classification report and confusion matrix use a stratified sample of that
+    size (raised to one row per class if smaller); accuracy and ROC-AUC are
+    always computed on the full set. Errors propagate to the caller.
+    """
+    print("Loading data and model...")
+    
+    # Load sessions and model
+    all_sessions = load_sessions()
+    saved = load_model_bundle()
+    model, test_session_ids = saved['model'], saved['test_session_ids']
+    features_df = load_features()
+    
+    # Prepare data (now includes session_duration)
+    X = np.ascontiguousarray(features_df[FEATURES].to_numpy(dtype=np.float32))
+    y_true = features_df['label'].to_numpy(dtype=np.int8)
+    
+    # Score only the held-out sessions when the split was saved with the model
+    if test_session_ids is not None:
+        missing = set(test_session_ids).difference(features_df['session_id'])
+        if missing:
+            raise ValueError(f"{len(missing)} held-out sessions are missing from the features file; "
+                             "retrain the model with train_model.py")
+        held_out = features_df['session_id'].isin(test_session_ids).to_numpy()
+        X, y_true = X[held_out], y_true[held_out]
+    
+    print(f"Evaluating on {len(y_true)} of {len(all_sessions)} sessions...")
+    
+    print("Making predictions...")
+    # Get probabilities in one pass and derive the predicted classes from them
+    proba = model.predict_proba(model_input(model, X))
+    y_pred = model.classes_[proba.argmax(1)]
+    y_pred_proba = proba[:, 1]
+    
+    print("Calculating metrics...")
+    # Calculate metrics
+    accuracy = accuracy_score(y_true, y_pred)
+    roc_auc = roc_auc_score(y_true, y_pred_proba)
+    
+    print(f"\nCOMPREHENSIVE EVALUATION RESULTS:")
+    print(f"=" * 50)
+    print(f"Total samples: {len(y_true)}")
+    print(f"Accuracy: {accuracy:.3f}")
+    print(f"ROC-AUC: {roc_auc:.3f}")
+    print(f"Features used: {FEATURES}")
+    
+    # Optionally report on a stratified sample of very large evaluation sets; both
+    # sides of the split need at least one row per class to stratify
+    n_classes = len(np.unique(y_true))
+    sample_size = max(eval_sample_size, n_classes) if eval_sample_size else None
+    if sample_size and len(y_true) - sample_size >= n_classes:
+        idx, _ = train_test_split(np.arange(len(y_true)), train_size=sample_size,
+                                  stratify=y_true, random_state=0)
+        y_true_s, y_pred_s = y_true[idx], y_pred[idx]
+        print(f"\nReporting on a stratified sample of {sample_size} sessions")
+    else:
+        y_true_s, y_pred_s = y_true, y_pred
+    
+    print(f"\nDetailed Classification Report:")
+    print(classification_report(y_true_s, y_pred_s, target_names=['Human', 'Bot']))
+    
+    # Confusion Matrix
+    print_confusion_matrix(confusion_matrix(y_true_s, y_pred_s))
+    
+    # Feature importance analysis
+    importances = model.feature_importances_
+    order = np.argsort(importances)[::-1]
+    
+    print(f"\nFeature Importance Ranking:")
+    for i, (feature, importance) in enumerate(zip(np.asarray(FEATURES)[order], importances[order]), 1):
+        print(f"{i}. {feature}: {importance:.3f}")
+    
+    # Performance by session type
+    human_accuracy = accuracy_score(y_true[y_true == 0], y_pred[y_true == 0])
+    bot_accuracy = accuracy_score(y_true[y_true == 1], y_pred[y_true == 1])
+    
+    print(f"\nPer-Class Performance:")
+    print(f"Human detection accuracy: {human_accuracy:.3f}")
+    print(f"Bot detection accuracy: {bot_accuracy:.3f}")
+    
+    return accuracy, roc_auc
 
 def test_individual_sessions():
     """Test individual sessions to demonstrate real-time prediction."""
@@ -90,63 +112,48 @@ def test_individual_sessions():
         
         # Load sessions
         print("Loading sessions...")
-        with open('data/all_sessions.json', 'r') as f:
-            all_sessions = json.load(f)
-        
-        # Find one human and one bot session
-        human_session = next(s for s in all_sessions if s['type'] == 'human')
-        bot_session = next(s for s in all_sessions if s['type'] == 'bot')
+        humans, bots, _, _ = partition_sessions()
         
-        # Test bot session
-        print("\nTesting Bot Session:")
-        print(f"   Session ID: {bot_session['session_id']}")
-        print(f"   Duration: {bot_session['metadata']['session_duration']:.3f}s")
-        with open('test_bot.json', 'w') as f:
-            json.dump(bot_session, f)
+        # Take the first human and bot session
+        human_session, bot_session = humans[0], bots[0]
         
-        prediction, confidence = predict_movement('test_bot.json')
-        result = "Bot" if prediction == 1 else "Human"
-        status = "CORRECT" if prediction == 1 else "INCORRECT"
-        print(f"   Result: {result} ({confidence:.1f}% confidence) {status}")
+        # Predict both sessions with one batched model call
+        predictions, confidences = predict_movement_batch([bot_session, human_session])
+        if predictions is None:
+            return
         
-        # Test human session
-        print("\nTesting Human Session:")
-        print(f"   Session ID: {human_session['session_id']}")
-        print(f"   Duration: {human_session['metadata']['session_duration']:.3f}s")
-        with open('test_human.json', 'w') as f:
-            json.dump(human_session, f)
-        
-        prediction, confidence = predict_movement('test_human.json')
-        result = "Bot" if prediction == 1 else "Human"
-        status = "CORRECT" if prediction == 0 else "INCORRECT"
-        print(f"   Result: {result} ({confidence:.1f}% confidence) {status}")
+        for session, expected, prediction, confidence in zip([bot_session, human_session], [1, 0],
+                                                             predictions, confidences):
+            print(f"\nTesting {session['type'].title()} Session:")
+            print(f"   Session ID: {session['session_id']}")
+            print(f"   Duration: {session['metadata']['session_duration']:.3f}s")
+            result = "Bot" if prediction == 1 else "Human"
+            status = "CORRECT" if prediction == expected else "INCORRECT"
+            print(f"   Result: {result} ({confidence:.1f}% confidence) {status}")
         
     except KeyboardInterrupt:
         print("\n\nIndividual session testing interrupted by user (Ctrl+C). Exiting gracefully...")
     except Exception as e:
         print(f"\nError during individual session testing: {e}")
 
-if __name__ == "__main__":
+def main():
+    """Run the full evaluation; returns (accuracy, roc_auc) or None on failure."""
     print("Running Comprehensive Model Testing...")
     print("=" * 60)
     
     try:
         # Run comprehensive evaluation
-        result = comprehensive_evaluation()
+        accuracy, roc_auc = comprehensive_evaluation()
         
-        if result[0] is not None:
-            accuracy, roc_auc = result
-            
-            # Test individual sessions
-            test_individual_sessions()
-            
-            print(f"\nSUMMARY:")
-            print(f"Overall Accuracy: {accuracy:.3f}")
-            print(f"ROC-AUC Score: {roc_auc:.3f}")
-            print(f"Session Duration: Key differentiator between humans and bots")
-            print(f"Testing completed successfully!")
-        else:
-            print("\nTesting failed or was interrupted.")
+        # Test individual sessions
+        test_individual_sessions()
+        
+        print(f"\nSUMMARY:")
+        print(f"Overall Accuracy: {accuracy:.3f}")
+        print(f"ROC-AUC Score: {roc_auc:.3f}")
+        print(f"Session Duration: Key differentiator between humans and bots")
+        print(f"Testing completed successfully!")
+        return accuracy, roc_auc
             
     except KeyboardInterrupt:
         print("\n\nProcess interrupted by user (Ctrl+C). Exiting gracefully...")
@@ -156,3 +163,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Unexpected error: {e}")
         print("Please check your data files and dependencies.")
+
+if __name__ == "__main__":
+    main()